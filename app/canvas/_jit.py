@@ -0,0 +1,16 @@
+"""Опциональная JIT-компиляция числовых хот-лупов через numba.
+
+numba не входит в зависимости проекта. Если она установлена,
+задекорированные функции компилируются в натив (кеш сохраняется между
+запусками); если нет — функции работают как обычный Python/NumPy без
+изменения поведения.
+"""
+
+
+def maybe_njit(**kwargs):
+    """Возвращает numba.njit(cache=True, ...) либо прозрачный декоратор."""
+    try:
+        from numba import njit
+    except ImportError:
+        return lambda func: func
+    return njit(cache=True, **kwargs)
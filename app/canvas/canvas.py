@@ -1,27 +1,275 @@
 import os
 import math
-from dataclasses import dataclass, field
+from collections import OrderedDict
 from typing import List, Optional
 
-from PySide6.QtCore import QPointF, QRectF, Qt, QSize, QRect
-from PySide6.QtGui import QColor, QImage, QPainter, QPen, QBrush
+import numpy as np
+from PySide6.QtCore import (QObject, QPointF, QRectF, QRunnable, Qt, QSize,
+                            QRect, QThreadPool, Signal, Slot)
+from PySide6.QtGui import (QColor, QImage, QImageReader, QPainter, QPen, QBrush,
+                           QPixmap, QPolygonF, QTransform)
 from PySide6.QtSvg import QSvgGenerator  # Добавлен импорт для SVG
 
-@dataclass
+from ._jit import maybe_njit
+
+# Стартовая ёмкость буфера точек штриха (растёт удвоением)
+_STROKE_INITIAL_CAPACITY = 64
+
+# Горячий путь ввода дергает hypot на каждый сэмпл — связываем один раз,
+# чтобы не резолвить math.hypot через атрибут модуля при каждом вызове
+_HYPOT = math.hypot
+
+# Шаг сетки, к которой выравниваются области частичной перерисовки:
+# выровненные блоки дружелюбнее к кешу/блиттеру, чем дробные прямоугольники
+_TILE_SIZE = 256
+
+# Предсобранные цвета/кисти горячих путей: без повторного парсинга
+# hex-строк и неявных конструкций QColor -> QBrush на каждый вызов
+_DEFAULT_BRUSH_COLOR = QColor(0x34, 0x98, 0xDB)
+_WHITE_BRUSH = QBrush(Qt.white)
+
+# Общая таблица перьев: различных комбинаций (цвет, толщина, инструмент)
+# за сессию единицы, а штрихов — тысячи. LRU на случай экзотических сессий
+_PEN_CACHE: "OrderedDict[tuple, QPen]" = OrderedDict()
+_PEN_CACHE_MAX = 256
+
+
+def _pen_for(color, thickness: float, tool: str) -> QPen:
+    rgba = color.rgba() if isinstance(color, QColor) else int(color)
+    key = (rgba, round(thickness, 2), tool)
+    pen = _PEN_CACHE.get(key)
+    if pen is None:
+        pen = QPen(QColor.fromRgba(rgba))
+        pen.setWidthF(thickness)
+        pen.setCapStyle(Qt.RoundCap)
+        pen.setJoinStyle(Qt.RoundJoin)
+        if len(_PEN_CACHE) >= _PEN_CACHE_MAX:
+            _PEN_CACHE.popitem(last=False)
+        _PEN_CACHE[key] = pen
+    else:
+        _PEN_CACHE.move_to_end(key)
+    return pen
+
+
+@maybe_njit()
+def _rdp_simplify(xy: np.ndarray, eps: float) -> np.ndarray:
+    """Упрощение ломаной алгоритмом Рамера-Дугласа-Пекера.
+
+    Итеративная (стековая) версия поверх массива (N, 2); расстояния до
+    хорды считаются векторно. Тело написано на njit-совместимом
+    подмножестве NumPy (см. _jit.maybe_njit) и без numba работает как
+    обычный векторный код. Возвращает новый массив значимых точек.
+    """
+    n = len(xy)
+    if n < 3:
+        return xy
+
+    keep = np.zeros(n, np.bool_)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 <= i0 + 1:
+            continue
+        p0 = xy[i0]
+        p1 = xy[i1]
+        seg = p1 - p0
+        seg_len = math.hypot(seg[0], seg[1])
+        dx = xy[i0 + 1:i1, 0] - p0[0]
+        dy = xy[i0 + 1:i1, 1] - p0[1]
+        if seg_len == 0.0:
+            dists = np.hypot(dx, dy)
+        else:
+            # Перпендикулярное расстояние: |(p1-p0) x (q-p0)| / |p1-p0|
+            dists = np.abs(seg[0] * dy - seg[1] * dx) / seg_len
+        idx = int(np.argmax(dists))
+        if dists[idx] > eps:
+            split = i0 + 1 + idx
+            keep[split] = True
+            stack.append((i0, split))
+            stack.append((split, i1))
+
+    return xy[keep]
+
 class Stroke:
-    points: List[QPointF] = field(default_factory=list)
-    color: QColor = field(default_factory=lambda: QColor(0, 0, 0))
-    thickness: float = 3.0
-    tool: str = "brush"
+    """Один штрих истории в компактном представлении.
+
+    Метаданные квантованы: цвет — uint32 RGBA вместо живого QColor,
+    толщина — в полупикселях, инструмент — числовой код. Вместе с
+    __slots__ это сильно уменьшает объект, и длинные истории при replay
+    обходить дешевле. QColor/QPen материализуются лениво через кеши.
+    """
+
+    __slots__ = ("xy", "n", "rgba", "thickness_q", "tool_id", "bbox",
+                 "comp_mode", "_pen", "_polygon")
+
+    def __init__(self, color=None, thickness: float = 3.0, tool: str = "brush"):
+        # Точки храним как непрерывный массив (N, 2) вместо списка QPointF:
+        # нет Python-объекта на каждую точку, append — запись в готовый слот
+        # float32 хватает для координат холста с запасом, а памяти — вдвое меньше
+        self.xy = np.empty((_STROKE_INITIAL_CAPACITY, 2), dtype=np.float32)
+        self.n = 0
+        self.rgba = QColor(color).rgba() if color is not None else 0xFF000000
+        # Гранулярность толщины 0.5 px — этого достаточно для слайдеров UI
+        self.thickness_q = max(1, round(thickness * 2))
+        self.tool_id = 1 if tool == "eraser" else 0
+        # Ограничивающий прямоугольник штриха (заполняется в end_stroke).
+        # Нужен, чтобы undo/redo перерисовывали только затронутую область.
+        self.bbox: Optional[QRectF] = None
+        # Режим композиции фиксирован инструментом — вычисляем один раз,
+        # чтобы убрать ветвление из циклов перерисовки
+        self.comp_mode = (QPainter.CompositionMode_Clear
+                          if self.tool_id
+                          else QPainter.CompositionMode_SourceOver)
+        # Кеши пера и готовой геометрии: собираются один раз, а не на
+        # каждый replay штриха
+        self._pen: Optional[QPen] = None
+        self._polygon: Optional[QPolygonF] = None
+
+    @property
+    def color(self) -> QColor:
+        return QColor.fromRgba(self.rgba)
+
+    @property
+    def tool(self) -> str:
+        return "eraser" if self.tool_id else "brush"
+
+    @property
+    def thickness(self) -> float:
+        return self.thickness_q * 0.5
+
+    @thickness.setter
+    def thickness(self, value: float):
+        self.thickness_q = max(1, round(float(value) * 2))
+        self._pen = None
+
+    def pen(self) -> QPen:
+        if self._pen is None:
+            # Перья разделяются между штрихами через общую таблицу,
+            # поэтому менять возвращённый объект на месте нельзя
+            self._pen = _pen_for(self.rgba, self.thickness, self.tool)
+        return self._pen
+
+    def invalidate_pen(self):
+        self._pen = None
+
+    def append(self, pos: QPointF):
+        if self.n == len(self.xy):
+            self.xy = np.resize(self.xy, (len(self.xy) * 2, 2))
+        self.xy[self.n, 0] = pos.x()
+        self.xy[self.n, 1] = pos.y()
+        self.n += 1
+        self._polygon = None
+
+    def point_at(self, index: int) -> QPointF:
+        return QPointF(self.xy[index, 0], self.xy[index, 1])
+
+    def last_point(self) -> QPointF:
+        return self.point_at(self.n - 1)
+
+    def polygon(self) -> QPolygonF:
+        if self._polygon is None:
+            self._polygon = QPolygonF([QPointF(x, y) for x, y in self.xy[:self.n]])
+        return self._polygon
+
+def _replay_strokes(painter: QPainter, strokes, region: Optional[QRectF] = None):
+    """Отрисовывает последовательность штрихов на уже настроенный painter."""
+    # Смена режима композиции сбрасывает выбранный блиттер растрового
+    # движка; переключаем его только на границах серий кисть/ластик.
+    # Перья из общей таблицы сравниваем по идентичности: серии штрихов
+    # одним цветом/толщиной обходятся одним setPen
+    active_mode = None
+    active_pen = None
+    for stroke in strokes:
+        if region is not None and stroke.bbox is not None and not stroke.bbox.intersects(region):
+            continue
+        if stroke.comp_mode != active_mode:
+            painter.setCompositionMode(stroke.comp_mode)
+            active_mode = stroke.comp_mode
+        pen = stroke.pen()
+        if pen is not active_pen:
+            painter.setPen(pen)
+            active_pen = pen
+        if stroke.n > 1:
+            # QPolygonF — непрерывный вектор QPointF: Qt обходит его
+            # без поэлементного маршалинга Python-списка
+            painter.drawPolyline(stroke.polygon())
+        elif stroke.n == 1:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(stroke.color)
+            r = stroke.thickness / 2
+            painter.drawEllipse(stroke.point_at(0), r, r)
+            active_pen = None  # Перо сброшено в NoPen — кеш недействителен
+
+
+# Предел истории undo: старые штрихи навсегда впечатываются в базовый
+# слой, чтобы память и стоимость rebuild не росли неограниченно
+_MAX_HISTORY = 100
+
+
+class _ImageResultBridge(QObject):
+    """Мост для доставки QImage из рабочего потока в GUI-поток.
+
+    Сигнал эмитится из рабочего потока, а объект живёт в главном —
+    Qt сам превращает соединение в очередь (QueuedConnection).
+    Номер поколения позволяет получателю отбрасывать устаревшие результаты.
+    """
+
+    finished = Signal(int, QImage)
+
+    def __init__(self, callback):
+        super().__init__()
+        self._callback = callback
+        self.finished.connect(self._on_finished)
+
+    @Slot(int, QImage)
+    def _on_finished(self, generation: int, image: QImage):
+        self._callback(generation, image)
+
+
+class _BackgroundLoadTask(QRunnable):
+    """Фоновое декодирование и масштабирование фоновой картинки."""
+
+    def __init__(self, generation: int, path: str, width: int, height: int,
+                 bridge: _ImageResultBridge):
+        super().__init__()
+        self._generation = generation
+        self._path = path
+        self._width = width
+        self._height = height
+        self._bridge = bridge
+
+    def run(self):
+        # Масштабируем прямо при декодировании: QImageReader не создаёт
+        # полноразмерный промежуточный QImage + отдельный проход scaled()
+        reader = QImageReader(self._path)
+        source_size = reader.size()
+        if source_size.isValid():
+            reader.setScaledSize(
+                source_size.scaled(self._width, self._height, Qt.KeepAspectRatio))
+        self._bridge.finished.emit(self._generation, reader.read())
+
+
+class CanvasModelSignals(QObject):
+    """Сигналы модели для подписчиков из GUI.
+
+    Сама модель — не QObject, поэтому сигналы живут в объекте-спутнике.
+    """
+
+    # Фоновая картинка декодировалась в пуле и готова к отрисовке
+    background_loaded = Signal()
+
 
 class CanvasModel:
     def __init__(self, width: int = 1920, height: int = 1080):
         self.width = width
         self.height = height
         
-        self.background_color: Optional[QColor] = None 
+        self.background_color: Optional[QColor] = None
         self.background_image: Optional[QImage] = None
         self.camera_frame: Optional[QImage] = None
+        self.camera_frame_version = 0
         
         self.grid_step = 80
         self.show_grid = True
@@ -34,23 +282,60 @@ class CanvasModel:
         self.allow_drawing = True
         self.allow_erasing = True
 
-        self.strokes: List[Stroke] = []
         self.undo_stack: List[Stroke] = []
         self.redo_stack: List[Stroke] = []
         self.current_stroke: Optional[Stroke] = None
 
-        self.current_color = QColor("#3498DB")
+        self.current_color = QColor(_DEFAULT_BRUSH_COLOR)
         self.current_tool = "brush"
         self.brush_size = 12.0
         self.eraser_size = 60.0
         
-        self.min_draw_distance = 4.0 
-
-        self._image = QImage(width, height, QImage.Format.Format_ARGB32)
-        self._image.fill(Qt.transparent)
+        self.min_draw_distance = 4.0
+        # Допуск RDP-упрощения штриха при завершении (в пикселях холста)
+        self.simplify_epsilon = 0.75
+
+        # Долгоживущий QPainter активного штриха: begin/end на QImage стоят
+        # дорого, поэтому открываем его один раз в begin_stroke, а не на
+        # каждое движение курсора
+        self._active_painter: Optional[QPainter] = None
+        self._active_pen: Optional[QPen] = None
+
+        # Область холста, изменившаяся с последней перерисовки виджета.
+        # Позволяет перерисовывать только затронутый участок, а не весь холст
+        self._pending_dirty: Optional[QRectF] = None
+
+        # QPixmap-зеркало буфера для пути отображения: на GPU-бэкендах
+        # живёт как текстура и блитится без CPU-копии каждый repaint
+        self._render_pixmap: Optional[QPixmap] = None
+        self._pixmap_dirty = True
+
+        # Базовый слой: штрихи, вытесненные из ограниченной истории undo.
+        # None, пока история не превышала _MAX_HISTORY
+        self._baseline: Optional[QImage] = None
+
+        # Поколение фоновой загрузки картинки фона: устаревшие результаты
+        # отбрасываются
+        self._bg_load_generation = 0
+        self._bg_load_bridge = _ImageResultBridge(self._apply_background_load)
+        self.signals = CanvasModelSignals()
+
+        # Premultiplied-формат заметно быстрее для SourceOver-блендинга
+        # растрового движка Qt (нет пере-умножения альфы на каждый пиксель)
+        self._image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        self._image.fill(0)  # int-оверлоад: 0 = прозрачный premultiplied, без разбора QColor
 
     def set_camera_frame(self, image: QImage):
+        # Растровый движок Qt блитит быстро только из RGB32/ARGB32_Premultiplied.
+        # Поток камеры уже отдаёт RGB32, так что ветка ниже — страховка для
+        # других источников кадров; конвертация выполняется один раз при
+        # приёме, а не на каждом repaint
+        if image.format() not in (QImage.Format_RGB32,
+                                  QImage.Format_ARGB32_Premultiplied):
+            image = image.convertToFormat(QImage.Format_RGB32)
         self.camera_frame = image
+        # Версия кадра — ключ кеша масштабирования в RenderEngine
+        self.camera_frame_version += 1
 
     def set_camera_opacity(self, opacity: float):
         self.camera_opacity = max(0.0, min(1.0, opacity))
@@ -69,8 +354,8 @@ class CanvasModel:
     def set_color(self, color: QColor):
         self.current_color = color
         if self.current_stroke and self.current_stroke.tool == "brush":
-            if self.current_stroke.points:
-                last_pos = self.current_stroke.points[-1]
+            if self.current_stroke.n > 0:
+                last_pos = self.current_stroke.last_point()
                 self.end_stroke()
                 self.begin_stroke(last_pos)
 
@@ -78,11 +363,15 @@ class CanvasModel:
         self.brush_size = float(size)
         if self.current_stroke and self.current_stroke.tool == "brush":
             self.current_stroke.thickness = self.brush_size
+            self._update_active_pen_width(self.brush_size)
+            self.current_stroke.invalidate_pen()
 
     def set_eraser_size(self, size: float):
         self.eraser_size = float(size)
         if self.current_stroke and self.current_stroke.tool == "eraser":
             self.current_stroke.thickness = self.eraser_size
+            self._update_active_pen_width(self.eraser_size)
+            self.current_stroke.invalidate_pen()
 
     @property
     def current_thickness(self) -> float:
@@ -98,114 +387,240 @@ class CanvasModel:
             thickness=self.current_thickness,
             tool=self.current_tool
         )
-        self.current_stroke.points.append(pos)
+        self.current_stroke.append(pos)
         self.redo_stack.clear()
+        self._open_stroke_painter()
         self._draw_point_to_buffer(pos)
 
     def continue_stroke(self, pos: QPointF):
-        if self.current_stroke and self.current_stroke.points:
-            last_point = self.current_stroke.points[-1]
-            
-            dx = pos.x() - last_point.x()
-            dy = pos.y() - last_point.y()
-            dist = math.hypot(dx, dy)
-            
-            if dist < self.min_draw_distance:
+        if self.current_stroke and self.current_stroke.n > 0:
+            stroke = self.current_stroke
+            last_x = stroke.xy[stroke.n - 1, 0]
+            last_y = stroke.xy[stroke.n - 1, 1]
+
+            if _HYPOT(pos.x() - last_x, pos.y() - last_y) < self.min_draw_distance:
                 return
 
-            self.current_stroke.points.append(pos)
-            
-            if len(self.current_stroke.points) >= 2:
-                p1 = self.current_stroke.points[-2]
-                p2 = self.current_stroke.points[-1]
-                self._draw_segment_to_buffer(p1, p2, self.current_stroke)
+            stroke.append(pos)
+
+            if stroke.n >= 2:
+                self._draw_segment_to_buffer(QPointF(last_x, last_y), pos, stroke)
 
     def end_stroke(self):
-        if self.current_stroke and len(self.current_stroke.points) > 0:
-            self.strokes.append(self.current_stroke)
-            self.undo_stack.append(self.current_stroke)
+        self._close_stroke_painter()
+        if self.current_stroke and self.current_stroke.n > 0:
+            stroke = self.current_stroke
+            if stroke.n > 2:
+                # Живое рисование уже на экране; в историю кладём упрощённую
+                # ломаную — replay и экспорт работают с меньшим числом точек
+                simplified = _rdp_simplify(stroke.xy[:stroke.n], self.simplify_epsilon)
+                stroke.xy = simplified
+                stroke.n = len(simplified)
+                stroke._polygon = None
+            stroke.bbox = self._compute_stroke_bbox(stroke)
+            self.undo_stack.append(stroke)
+            self.current_stroke = None
+            # Черновой (без AA) живой след перерисовываем начисто одним
+            # региональным rebuild — он же синхронизирует буфер с
+            # упрощённой геометрией штриха
+            self._rebuild_image(region=self._align_to_tiles(stroke.bbox))
+            if len(self.undo_stack) > _MAX_HISTORY:
+                self._flatten_into_baseline(self.undo_stack.pop(0))
         self.current_stroke = None
 
     def undo(self):
         if self.undo_stack:
             stroke = self.undo_stack.pop()
             self.redo_stack.append(stroke)
-            self._rebuild_image()
+            self._rebuild_image(region=self._align_to_tiles(stroke.bbox))
 
     def redo(self):
         if self.redo_stack:
             stroke = self.redo_stack.pop()
             self.undo_stack.append(stroke)
-            self._rebuild_image()
+            # Возвращаемый штрих был вершиной истории — достаточно дорисовать
+            # его поверх буфера, без перерисовки региона из всей истории
+            self._close_stroke_painter()
+            painter = QPainter(self._image)
+            self._configure_painter(painter)
+            _replay_strokes(painter, (stroke,))
+            painter.end()
+            self._mark_dirty(stroke.bbox if stroke.bbox is not None
+                             else QRectF(0, 0, self.width, self.height))
+
+    def _align_to_tiles(self, rect: Optional[QRectF]) -> Optional[QRectF]:
+        """Расширяет область до границ тайловой сетки в пределах холста."""
+        if rect is None:
+            return None
+        t = _TILE_SIZE
+        x0 = max(0.0, math.floor(rect.left() / t) * t)
+        y0 = max(0.0, math.floor(rect.top() / t) * t)
+        x1 = min(float(self.width), math.ceil(rect.right() / t) * t)
+        y1 = min(float(self.height), math.ceil(rect.bottom() / t) * t)
+        return QRectF(x0, y0, max(0.0, x1 - x0), max(0.0, y1 - y0))
+
+    @property
+    def strokes(self) -> List[Stroke]:
+        """Видимые (не отменённые) штрихи; синоним вершины истории."""
+        return self.undo_stack
 
     def clear(self):
-        self.strokes.clear()
         self.undo_stack.clear()
         self.redo_stack.clear()
+        self._baseline = None
         self.background_image = None
+        # Сброс фона обесценивает и ещё не доехавшие фоновые загрузки
+        self._bg_load_generation += 1
         self._rebuild_image()
 
     def load_background(self, path: str):
-        img = QImage(path)
-        if not img.isNull():
-            self.background_image = img.scaled(self.width, self.height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self._rebuild_image()
-
-    def _draw_point_to_buffer(self, point: QPointF):
+        # Декодирование большого файла блокировало бы GUI-поток —
+        # уводим его в пул, результат приедет в _apply_background_load
+        self._bg_load_generation += 1
+        task = _BackgroundLoadTask(self._bg_load_generation, path,
+                                   self.width, self.height, self._bg_load_bridge)
+        QThreadPool.globalInstance().start(task)
+
+    def _apply_background_load(self, generation: int, image: QImage):
+        if generation != self._bg_load_generation or image.isNull():
+            return  # Пользователь успел выбрать другой файл / декодер упал
+        self.background_image = image
+        # Фон рисует RenderEngine отдельным слоем — перерисовывать
+        # историю штрихов не нужно, достаточно пометить холст грязным
+        self._mark_dirty(QRectF(0, 0, self.width, self.height))
+        # В режиме без камеры нет цикла кадров, который бы заметил грязную
+        # область — извещаем представление о готовности фона явно
+        self.signals.background_loaded.emit()
+
+    def _open_stroke_painter(self):
+        """Открывает painter активного штриха и настраивает его один раз."""
+        self._close_stroke_painter()
         painter = QPainter(self._image)
-        self._configure_painter(painter)
-        if self.current_tool == "eraser":
-            painter.setCompositionMode(QPainter.CompositionMode_Clear)
+        self._configure_painter(painter, fast=True)
+        painter.setCompositionMode(self.current_stroke.comp_mode)
+
+        pen = self.current_stroke.pen()
+        painter.setPen(pen)
+
+        self._active_painter = painter
+        self._active_pen = pen
+
+    def _close_stroke_painter(self):
+        if self._active_painter is not None:
+            self._active_painter.end()
+            self._active_painter = None
+            self._active_pen = None
+
+    def _mark_dirty(self, rect: QRectF):
+        if self._pending_dirty is None:
+            self._pending_dirty = QRectF(rect)
         else:
-            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-            painter.setPen(Qt.NoPen)
-            painter.setBrush(self.current_stroke.color)
-            r = self.current_stroke.thickness / 2
-            painter.drawEllipse(point, r, r)
-        painter.end()
+            self._pending_dirty = self._pending_dirty.united(rect)
+        self._pixmap_dirty = True
+
+    def get_render_pixmap(self) -> QPixmap:
+        """QPixmap-версия буфера штрихов; пересоздаётся только после изменений."""
+        if self._pixmap_dirty or self._render_pixmap is None:
+            self._render_pixmap = QPixmap.fromImage(self._image)
+            self._pixmap_dirty = False
+        return self._render_pixmap
+
+    def take_dirty_rect(self) -> Optional[QRectF]:
+        """Возвращает накопленную грязную область и сбрасывает её."""
+        rect = self._pending_dirty
+        self._pending_dirty = None
+        return rect
+
+    def _update_active_pen_width(self, width: float):
+        if self._active_painter is not None and self.current_stroke is not None:
+            # Перья из таблицы общие — не мутируем, а берём перо нужной толщины
+            stroke = self.current_stroke
+            self._active_pen = _pen_for(stroke.color, width, stroke.tool)
+            self._active_painter.setPen(self._active_pen)
+
+    def _draw_point_to_buffer(self, point: QPointF):
+        painter = self._active_painter
+        if painter is None or self.current_stroke.tool == "eraser":
+            # Ластик стартовую точку не рисует (как и раньше)
+            return
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.current_stroke.color)
+        r = self.current_stroke.thickness / 2
+        painter.drawEllipse(point, r, r)
+        painter.setPen(self._active_pen)
+        painter.setBrush(Qt.NoBrush)
+        r += 1
+        self._mark_dirty(QRectF(point.x() - r, point.y() - r, 2 * r, 2 * r))
 
     def _draw_segment_to_buffer(self, p1: QPointF, p2: QPointF, stroke: Stroke):
+        if self._active_painter is None:
+            # Painter мог закрыться из-за undo/redo во время штриха
+            self._open_stroke_painter()
+        self._active_painter.drawLine(p1, p2)
+        r = stroke.thickness / 2 + 1
+        self._mark_dirty(QRectF(p1, p2).normalized().adjusted(-r, -r, r, r))
+
+    def _compute_stroke_bbox(self, stroke: Stroke) -> QRectF:
+        """Ограничивающий прямоугольник штриха с запасом на толщину пера."""
+        pts = stroke.xy[:stroke.n]
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        r = stroke.thickness / 2 + 1
+        return QRectF(x0 - r, y0 - r, x1 - x0 + 2 * r, y1 - y0 + 2 * r)
+
+    def _rebuild_image(self, region: Optional[QRectF] = None):
+        """Перерисовывает буфер из истории штрихов.
+
+        Если передан region, очищается и перерисовывается только эта область:
+        стоимость undo/redo становится пропорциональной bbox одного штриха,
+        а не размеру всего холста и длине всей истории.
+        """
+        # Нельзя держать два QPainter на одном QImage одновременно
+        self._close_stroke_painter()
+
+        if region is None:
+            if self._baseline is not None:
+                self._image = self._baseline.copy()
+            else:
+                self._image.fill(0)  # int-оверлоад: 0 = прозрачный premultiplied, без разбора QColor
+
         painter = QPainter(self._image)
         self._configure_painter(painter)
-        if stroke.tool == "eraser":
-            painter.setCompositionMode(QPainter.CompositionMode_Clear)
-        else:
+
+        if region is not None:
+            painter.setClipRect(region)
+            if self._baseline is not None:
+                # Вместо чистой очистки восстанавливаем пиксели базового слоя
+                painter.setCompositionMode(QPainter.CompositionMode_Source)
+                painter.drawImage(region, self._baseline, region)
+            else:
+                painter.setCompositionMode(QPainter.CompositionMode_Clear)
+                painter.fillRect(region, Qt.transparent)
             painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-        
-        pen = QPen(stroke.color)
-        pen.setWidthF(stroke.thickness)
-        pen.setCapStyle(Qt.RoundCap)
-        pen.setJoinStyle(Qt.RoundJoin)
-        painter.setPen(pen)
-        painter.drawLine(p1, p2)
+
+        _replay_strokes(painter, self.undo_stack, region)
         painter.end()
 
-    def _rebuild_image(self):
-        self._image.fill(Qt.transparent)
-        painter = QPainter(self._image)
+        self._mark_dirty(region if region is not None
+                         else QRectF(0, 0, self.width, self.height))
+
+    def _flatten_into_baseline(self, stroke: Stroke):
+        """Навсегда впечатывает вытесненный из истории штрих в базовый слой."""
+        if self._baseline is None:
+            self._baseline = QImage(self.width, self.height,
+                                    QImage.Format.Format_ARGB32_Premultiplied)
+            self._baseline.fill(0)
+        painter = QPainter(self._baseline)
         self._configure_painter(painter)
-        for stroke in self.undo_stack:
-            if stroke.tool == "eraser":
-                painter.setCompositionMode(QPainter.CompositionMode_Clear)
-            else:
-                painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-            pen = QPen(stroke.color)
-            pen.setWidthF(stroke.thickness)
-            pen.setCapStyle(Qt.RoundCap)
-            pen.setJoinStyle(Qt.RoundJoin)
-            painter.setPen(pen)
-            if len(stroke.points) > 1:
-                painter.drawPolyline(stroke.points)
-            elif len(stroke.points) == 1:
-                 painter.setPen(Qt.NoPen)
-                 painter.setBrush(stroke.color)
-                 r = stroke.thickness / 2
-                 painter.drawEllipse(stroke.points[0], r, r)
+        _replay_strokes(painter, (stroke,))
         painter.end()
 
-    def _configure_painter(self, painter: QPainter):
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    def _configure_painter(self, painter: QPainter, fast: bool = False):
+        # fast=True — черновой режим для живого штриха: без AA сегмент
+        # растеризуется в 2-3 раза дешевле, а начисто штрих перерисуется
+        # одним региональным rebuild в end_stroke
+        painter.setRenderHint(QPainter.Antialiasing, not fast)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, not fast)
 
     @property
     def image(self) -> QImage:
@@ -217,6 +632,18 @@ class RenderEngine:
         self.model = model
         self.scale_factor = 1.0
         self.offset = QPointF(0, 0)
+
+        # Кеш кадра камеры, отмасштабированного до размера холста:
+        # ресемплинг выполняется один раз на новый кадр, а не на каждый repaint
+        self._camera_scaled: Optional[QImage] = None
+        self._camera_cache_key = -1
+
+        # Переиспользуемый буфер композита для экспорта (см. save_to_file)
+        self._export_buffer: Optional[QImage] = None
+
+        # Кеш матрицы вида: пересобирается только при смене offset/scale
+        self._view_transform = QTransform()
+        self._view_key = (0.0, 0.0, 1.0)
         
     def zoom(self, delta_scale: float, mouse_pos: QPointF):
         old_scale = self.scale_factor
@@ -229,30 +656,78 @@ class RenderEngine:
         self.scale_factor = new_scale
         self.offset = new_offset
 
-    def render_to_painter(self, painter: QPainter, target_rect: QRectF):
-        painter.save()
-        
-        painter.fillRect(target_rect, Qt.white)
-        
-        painter.translate(self.offset)
-        painter.scale(self.scale_factor, self.scale_factor)
-        
-        if self.model.camera_frame and self.model.camera_opacity > 0.01:
-            painter.save()
-            painter.setOpacity(self.model.camera_opacity)
-            painter.drawImage(QRectF(0, 0, self.model.width, self.model.height), self.model.camera_frame)
-            painter.restore()
-            
-        if self.model.background_image:
-            painter.drawImage(0, 0, self.model.background_image)
-            
-        painter.drawImage(0, 0, self.model.image)
-        
-        if self.model.cursor_active:
-             painter.setOpacity(1.0)
-             self._draw_cursor(painter)
+    def canvas_rect_to_screen(self, rect: QRectF) -> QRectF:
+        """Переводит прямоугольник из координат холста в координаты виджета."""
+        # Та же кешированная матрица, что и в render_to_painter
+        return self._compose_view_transform().mapRect(rect)
 
-        painter.restore()
+    def render_to_painter(self, painter: QPainter, target_rect: QRectF):
+        # Метод вызывается на каждый repaint — модель берём в локальную
+        # переменную, чтобы не повторять атрибутные обращения self.model.*
+        model = self.model
+
+        painter.fillRect(target_rect, _WHITE_BRUSH)
+
+        # save/restore клонирует всё состояние painter (перо, клип, шрифт...);
+        # нам нужна только матрица вида — ставим и возвращаем её явно
+        prev_transform = painter.transform()
+        painter.setTransform(self._compose_view_transform(), True)
+
+        # Билинейный ресемплинг нужен только при реальном масштабировании;
+        # при zoom = 1.0 блиты идут по быстрому пути "1 текстель = 1 пиксель"
+        smooth = abs(self.scale_factor - 1.0) > 1e-3
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, smooth)
+
+        if model.camera_frame and model.camera_opacity > 0.01:
+            painter.setOpacity(model.camera_opacity)
+            # Кадр из кеша уже размером с холст — drawImage(int, int, ...)
+            # попадает в блит 1:1 без пути масштабирования
+            painter.drawImage(0, 0, self._scaled_camera_frame())
+            painter.setOpacity(1.0)
+
+        if model.background_image:
+            painter.drawImage(0, 0, model.background_image)
+
+        # Штрихи уже сглажены при растеризации — ресемплить их слой
+        # повторно не нужно даже под зумом
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+
+        if model.current_stroke is not None:
+            # Во время активного штриха буфер меняется каждый тик —
+            # конвертация в QPixmap на каждый кадр была бы дороже блита
+            painter.drawImage(0, 0, model.image)
+        else:
+            painter.drawPixmap(0, 0, model.get_render_pixmap())
+
+        if model.cursor_active:
+            self._draw_cursor(painter)
+
+        painter.setTransform(prev_transform)
+
+    def _compose_view_transform(self) -> QTransform:
+        """Матрица вида (offset + zoom); кешируется между кадрами."""
+        key = (self.offset.x(), self.offset.y(), self.scale_factor)
+        if key != self._view_key:
+            t = QTransform()
+            t.translate(self.offset.x(), self.offset.y())
+            t.scale(self.scale_factor, self.scale_factor)
+            self._view_transform = t
+            self._view_key = key
+        return self._view_transform
+
+    def _scaled_camera_frame(self) -> QImage:
+        """Кадр камеры, приведённый к размеру холста (с кешированием)."""
+        key = self.model.camera_frame_version
+        if key != self._camera_cache_key:
+            frame = self.model.camera_frame
+            if frame.width() != self.model.width or frame.height() != self.model.height:
+                self._camera_scaled = frame.scaled(
+                    self.model.width, self.model.height,
+                    Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            else:
+                self._camera_scaled = frame
+            self._camera_cache_key = key
+        return self._camera_scaled
 
     def _draw_cursor(self, painter: QPainter):
         x, y = self.model.cursor_pos.x(), self.model.cursor_pos.y()
@@ -291,17 +766,27 @@ class RenderEngine:
 
     def save_to_file(self, filename_hint: str = "artwork") -> bool:
         """Сохранение в растровый формат (PNG/JPG)"""
-        result = QImage(self.model.width, self.model.height, QImage.Format_ARGB32)
-        result.fill(Qt.white) 
-        
+        # Не аллоцируем ~8 МБ на каждый экспорт: держим один буфер
+        # и пересоздаём его только при смене размера холста
+        if (self._export_buffer is None
+                or self._export_buffer.width() != self.model.width
+                or self._export_buffer.height() != self.model.height):
+            self._export_buffer = QImage(
+                self.model.width, self.model.height,
+                QImage.Format_ARGB32_Premultiplied)
+        result = self._export_buffer
+        result.fill(Qt.white)
+
         painter = QPainter(result)
         if self.model.background_image:
             painter.drawImage(0, 0, self.model.background_image)
-            
+
         painter.drawImage(0, 0, self.model.image)
         painter.end()
-        
-        return result.save(filename_hint)
+
+        # Композит собран поверх белого и полностью непрозрачен — кодируем
+        # RGB888 без альфа-канала: на четверть меньше данных для deflate
+        return result.convertToFormat(QImage.Format_RGB888).save(filename_hint)
 
     def save_to_svg(self, filename: str) -> bool:
         """Сохранение в векторный формат SVG"""
@@ -324,26 +809,29 @@ class RenderEngine:
             
         # 3. Перерисовываем векторы
         # ВАЖНО: Мы не рисуем растр self.model.image, мы перерисовываем штрихи из истории
+        active_pen = None
         for stroke in self.model.undo_stack:
-            pen = QPen(stroke.color)
-            
-            # Для ластика в SVG используем белую кисть (перекрытие)
-            if stroke.tool == "eraser":
-                pen.setColor(Qt.white)
-            
-            pen.setWidthF(stroke.thickness)
-            pen.setCapStyle(Qt.RoundCap)
-            pen.setJoinStyle(Qt.RoundJoin)
-            painter.setPen(pen)
-            
-            if len(stroke.points) > 1:
-                painter.drawPolyline(stroke.points)
-            elif len(stroke.points) == 1:
+            if stroke.n == 0:
+                continue
+            # Для ластика в SVG используем белую кисть (перекрытие);
+            # перья берём из общей таблицы, серии одного стиля дают один setPen
+            if stroke.tool_id:
+                pen = _pen_for(0xFFFFFFFF, stroke.thickness, "eraser")
+            else:
+                pen = stroke.pen()
+            if pen is not active_pen:
+                painter.setPen(pen)
+                active_pen = pen
+
+            if stroke.n > 1:
+                painter.drawPolyline(stroke.polygon())
+            else:
                 # Точка
                 painter.setBrush(pen.color())
                 painter.setPen(Qt.NoPen)
                 r = stroke.thickness / 2
-                painter.drawEllipse(stroke.points[0], r, r)
+                painter.drawEllipse(stroke.point_at(0), r, r)
+                active_pen = None
         
         painter.end()
         return True
\ No newline at end of file
@@ -1,7 +1,5 @@
 import sys
-import cv2
-from PySide6.QtCore import QTimer, QPointF
-from PySide6.QtGui import QImage
+from PySide6.QtCore import QPointF, QRectF
 from PySide6.QtWidgets import QApplication
 
 from app.canvas.canvas import CanvasModel, RenderEngine
@@ -37,6 +35,11 @@ class AppCore:
         self.model = CanvasModel(width=self.model_width, height=self.model_height)
         self.engine = RenderEngine(self.model)
 
+        # Готовые коэффициенты камера→холст: в _game_loop остаётся по
+        # одному умножению на координату вместо деления и лишних lookup'ов
+        self._x_scale = self.model_width / self.cam_width
+        self._y_scale = self.model_height / self.cam_height
+
         self.window = MainWindow(self.model, self.engine)
 
         ui_padding_w = 260
@@ -47,99 +50,135 @@ class AppCore:
         self.window.resize(target_w, target_h)
         self.window.show()
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self._game_loop)
+        # Состояние частичной перерисовки холста
+        self._camera_frame_dirty = False
+        self._last_cursor_screen_rect = None
+
+        # Цикл обработки событийный: поток камеры сам сообщает о готовом
+        # кадре, вместо слепого опроса таймером каждые 16 мс
         if self.camera_available:
-            self.timer.start(16)
+            self.camera.frame_ready.connect(self._game_loop)
 
     def run(self):
         return self.app.exec()
 
-    def _game_loop(self):
+    def _cursor_screen_rect(self):
+        """Экранный прямоугольник курсора (с запасом на обводку)."""
+        if not self.model.cursor_active:
+            return None
+        r = max(self.model.current_thickness / 2, 8) + 6
+        pos = self.model.cursor_pos
+        rect = QRectF(pos.x() - r, pos.y() - r, 2 * r, 2 * r)
+        return self.engine.canvas_rect_to_screen(rect)
+
+    def _update_canvas(self):
+        """Запрашивает перерисовку только изменившейся области виджета.
+
+        Если пришёл новый кадр камеры и он виден (прозрачность > 0),
+        меняется весь фон — перерисовываем целиком. Иначе достаточно
+        объединения грязной области штриха и старой/новой позиции курсора.
+        """
+        widget = self.window.canvas_widget
+
+        if self._camera_frame_dirty and self.model.camera_opacity > 0.01:
+            self._camera_frame_dirty = False
+            self.model.take_dirty_rect()
+            self._last_cursor_screen_rect = self._cursor_screen_rect()
+            widget.update()
+            return
+
+        self._camera_frame_dirty = False
+
+        dirty = self.model.take_dirty_rect()
+        screen = self.engine.canvas_rect_to_screen(dirty) if dirty is not None else QRectF()
+
+        cursor_rect = self._cursor_screen_rect()
+        if self._last_cursor_screen_rect is not None:
+            screen = screen.united(self._last_cursor_screen_rect)
+        if cursor_rect is not None:
+            screen = screen.united(cursor_rect)
+        self._last_cursor_screen_rect = cursor_rect
+
+        if screen.isNull():
+            return
+        widget.update(screen.toAlignedRect().adjusted(-2, -2, 2, 2))
+
+    def _game_loop(self, data):
         if not self.camera_available:
             return
 
-        data = self.camera.get_frame_data()
+        # Если GUI не успевает за камерой, в очереди событий копятся кадры.
+        # Обрабатываем только самый свежий: устаревшие (seq меньше номера
+        # последнего произведённого кадра) просто отбрасываем
+        if data.seq != self.camera.frame_seq:
+            return
+
+        # Метод вызывается на каждый кадр камеры — горячие атрибуты
+        # снимаем в локальные переменные один раз
+        model = self.model
+        gesture = data.gesture
+        cursor_x = data.cursor_x
+        cursor_y = data.cursor_y
 
         # --- ФИЛЬТРАЦИЯ ОТКЛЮЧЕННЫХ ЖЕСТОВ ---
-        if data.gesture == "drawing" and not self.model.allow_drawing:
-            data.gesture = "idle"
-            data.cursor_x = -1
-            data.cursor_y = -1
-
-        if data.gesture == "erasing" and not self.model.allow_erasing:
-            data.gesture = "idle"
-            data.cursor_x = -1
-            data.cursor_y = -1
+        if ((gesture == "drawing" and not model.allow_drawing)
+                or (gesture == "erasing" and not model.allow_erasing)):
+            gesture = data.gesture = "idle"
+            cursor_x = data.cursor_x = -1
+            cursor_y = data.cursor_y = -1
 
         # --- РАСЧЕТ КООРДИНАТ ---
-        if data.cursor_x != -1:
+        if cursor_x != -1:
             # Зеркалим X, так как камера обычно отзеркалена для удобства
-            cv_draw_x = self.cam_width - data.cursor_x
-            cv_draw_y = data.cursor_y
-
-            norm_x = cv_draw_x / self.cam_width
-            norm_y = cv_draw_y / self.cam_height
-
-            model_x = norm_x * self.model.width
-            model_y = norm_y * self.model.height
-            canvas_pos = QPointF(model_x, model_y)
+            canvas_pos = QPointF((self.cam_width - cursor_x) * self._x_scale,
+                                 cursor_y * self._y_scale)
         else:
             canvas_pos = QPointF(-1, -1)
 
         # --- ОБНОВЛЕНИЕ КАРТИНКИ КАМЕРЫ ---
-        if data.raw_frame is not None:
-            # Просто зеркалим фрейм.
+        if data.qt_image is not None:
             # ВАЖНО: Мы НЕ рисуем здесь cv2.circle.
             # Курсор рисует RenderEngine поверх всего.
-            display_frame = cv2.flip(data.raw_frame, 1)
-
-            rgb_frame = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            qt_image = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
-            self.model.set_camera_frame(qt_image.copy())
+            # Кадр уже отзеркален и сконвертирован в потоке камеры —
+            # GUI-потоку остаётся только передать его модели
+            model.set_camera_frame(data.qt_image)
+            self._camera_frame_dirty = True
 
         # --- ПЕРЕДАЕМ ДАННЫЕ О КУРСОРЕ В МОДЕЛЬ ---
         # Модель сохранит эти данные, а RenderEngine отрисует их поверх слоев
-        self.model.update_cursor(canvas_pos.x(), canvas_pos.y(), data.gesture)
+        model.update_cursor(canvas_pos.x(), canvas_pos.y(), gesture)
 
         # --- ОБНОВЛЕНИЕ UI ---
-        self.window.update_gesture_hint(data.gesture)
+        self.window.update_gesture_hint(gesture)
 
         # Если рука потеряна или жест невалиден
-        if data.cursor_x == -1 or data.cursor_y == -1:
-            if self.model.current_stroke:
-                self.model.end_stroke()
-            self.window.canvas_widget.update()
+        if cursor_x == -1 or cursor_y == -1:
+            if model.current_stroke:
+                model.end_stroke()
+            self._update_canvas()
             return
 
         # --- ЛОГИКА РИСОВАНИЯ ---
-        if self.model.current_stroke:
+        tool = model.current_tool
+        if model.current_stroke:
             # Проверяем, не сменился ли жест внезапно
-            is_consistent = False
-            if self.model.current_tool == "brush" and data.gesture == "drawing":
-                is_consistent = True
-            elif self.model.current_tool == "eraser" and data.gesture == "erasing":
-                is_consistent = True
+            is_consistent = ((tool == "brush" and gesture == "drawing")
+                             or (tool == "eraser" and gesture == "erasing"))
 
             if is_consistent:
-                self.model.continue_stroke(canvas_pos)
+                model.continue_stroke(canvas_pos)
             else:
-                self.model.end_stroke()
-
-            self.window.canvas_widget.update()
+                model.end_stroke()
         else:
             # Начинаем новый штрих
-            if data.gesture == "drawing":
-                if self.model.current_tool != "brush":
+            if gesture == "drawing":
+                if tool != "brush":
                     self.window.set_tool("Brush")
-                self.model.begin_stroke(canvas_pos)
-                self.window.canvas_widget.update()
+                model.begin_stroke(canvas_pos)
 
-            elif data.gesture == "erasing":
-                if self.model.current_tool != "eraser":
+            elif gesture == "erasing":
+                if tool != "eraser":
                     self.window.set_tool("Eraser")
-                self.model.begin_stroke(canvas_pos)
-                self.window.canvas_widget.update()
+                model.begin_stroke(canvas_pos)
 
-            self.window.canvas_widget.update()
+        self._update_canvas()
@@ -17,10 +17,20 @@ class CanvasWidget(QWidget):
         self._model = model
         self._engine = engine
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        # paintEvent закрашивает каждый пиксель сам (fillRect фоном) —
+        # говорим Qt не тратить время на собственную заливку фона
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.setAttribute(Qt.WA_NoSystemBackground, True)
+        # Кеш растеризованной сетки: перерисовывать все линии на каждый
+        # кадр камеры дорого, а сетка меняется только при пане/зуме/resize
+        self._grid_cache: Optional[QPixmap] = None
+        self._grid_cache_key = None
 
     def paintEvent(self, event: QPaintEvent):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
+        # При частичном update() перерисовываем только запрошенную область
+        painter.setClipRect(event.rect())
         self._engine.render_to_painter(painter, self.rect())
         
         # Отрисовка сетки только если включена
@@ -36,19 +46,32 @@ class CanvasWidget(QWidget):
 
     def _draw_grid(self, painter: QPainter):
         step = self._model.grid_step * self._engine.scale_factor
-        if step < 20: return 
-        painter.save()
-        painter.translate(self._engine.offset)
-        painter.scale(self._engine.scale_factor, self._engine.scale_factor)
+        if step < 20: return
+        offset = self._engine.offset
+        key = (self.width(), self.height(), self._engine.scale_factor,
+               offset.x(), offset.y(), self._model.grid_step)
+        if key != self._grid_cache_key:
+            self._grid_cache = self._render_grid_pixmap()
+            self._grid_cache_key = key
+        painter.drawPixmap(0, 0, self._grid_cache)
+
+    def _render_grid_pixmap(self) -> QPixmap:
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.transparent)
+        p = QPainter(pixmap)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.translate(self._engine.offset)
+        p.scale(self._engine.scale_factor, self._engine.scale_factor)
         pen = QPen(QColor(0, 0, 0, 30))
-        pen.setWidthF(1.0 / self._engine.scale_factor) 
-        painter.setPen(pen)
+        pen.setWidthF(1.0 / self._engine.scale_factor)
+        p.setPen(pen)
         w, h = self._model.width, self._model.height
         for x in range(0, w, self._model.grid_step):
-            painter.drawLine(x, 0, x, h)
+            p.drawLine(x, 0, x, h)
         for y in range(0, h, self._model.grid_step):
-            painter.drawLine(0, y, w, y)
-        painter.restore()
+            p.drawLine(0, y, w, y)
+        p.end()
+        return pixmap
 
 # --- КОМПОНЕНТЫ UI ---
 class ToolButton(QPushButton):
@@ -59,6 +82,9 @@ class ToolButton(QPushButton):
         self.setFixedSize(size, size)
         self._size = size
         self._is_active = False
+        # Последний применённый QSS: setStyleSheet заставляет Qt заново
+        # парсить стиль, поэтому не вызываем его с той же строкой повторно
+        self._applied_style = ""
         self.setCheckable(checkable)
         self._init_style()
 
@@ -118,6 +144,12 @@ class ToolButton(QPushButton):
                     }}
                     QPushButton:hover {{ background-color: {bg_normal_hover}; border: 2px solid #BDC3C7; }}
                 """
+        self._apply_style(style)
+
+    def _apply_style(self, style: str):
+        if style == self._applied_style:
+            return
+        self._applied_style = style
         self.setStyleSheet(style)
 
 class ColorSwatchButton(ToolButton):
@@ -150,11 +182,11 @@ class ColorSwatchButton(ToolButton):
         if self._is_picker:
              bg_style = "background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #ff9a9e, stop:1 #fad0c4);"
 
-        self.setStyleSheet(f"""
-            QPushButton {{ 
+        self._apply_style(f"""
+            QPushButton {{
                 {bg_style}
-                border: {border}; 
-                border-radius: {self._size // 2}px; 
+                border: {border};
+                border-radius: {self._size // 2}px;
                 color: #333; font-weight: bold; font-size: 14px;
             }}
             QPushButton:hover {{ border: 3px solid #BDC3C7; }}
@@ -166,8 +198,14 @@ class GestureHintWidget(QLabel):
         self.setAlignment(Qt.AlignCenter)
         self.setStyleSheet("background: #2C3E50; color: #ECF0F1; padding: 10px 20px; border-radius: 10px; font-weight: 600;")
         self.setFixedHeight(40)
-    
+        self._last_gesture = None
+
     def update_hint(self, gesture: str):
+        # Вызывается на каждый кадр камеры; setText/setStyleSheet
+        # инвалидируют виджет, поэтому дёргаем их только при смене жеста
+        if gesture == self._last_gesture:
+            return
+        self._last_gesture = gesture
         mapping = {
             "idle": "✋ Поднимите палец для рисования",
             "drawing": "☝️ Рисование (Указательный палец)",
@@ -216,6 +254,9 @@ class MainWindow(QMainWindow):
         
         self.canvas_widget = CanvasWidget(self._model, self._engine)
         mid_layout.addWidget(self.canvas_widget, stretch=1)
+        # Фон декодируется асинхронно в пуле — перерисовываем холст,
+        # когда он действительно готов (важно в режиме без камеры)
+        self._model.signals.background_loaded.connect(self.canvas_widget.update)
         
         self._create_right_control_panel(mid_layout)
         main_layout.addLayout(mid_layout, stretch=1)
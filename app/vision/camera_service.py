@@ -1,15 +1,24 @@
+import threading
 import time
 import cv2
 import mediapipe as mp
 import numpy as np
 
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QImage
+
 from .frame_data import FrameData
 from .gesture_detector import GestureDetector
 from .smoother import OneEuroFilter
 from .metrics import MetricsCollector
 
-class CameraService:
+class CameraService(QObject):
+    # Эмитится из потока камеры с готовым FrameData; подписчики в
+    # GUI-потоке получают его через очередь событий Qt
+    frame_ready = Signal(object)
+
     def __init__(self, camera_index: int = 0, resolution: tuple = (640, 480)):
+        super().__init__()
         self.cap = cv2.VideoCapture(camera_index)
         if not self.cap.isOpened():
             raise RuntimeError(f"Не удалось открыть камеру {camera_index}")
@@ -43,7 +52,63 @@ class CameraService:
 
         self.last_frame_time = 0
 
+        # Захват и обработка (MediaPipe + конвертация кадра) живут в своём
+        # потоке: GUI-поток только забирает готовый результат из "почтового
+        # ящика" глубиной 1 (новый кадр вытесняет недоставленный старый)
+        self._latest: FrameData = None
+        self._last_delivered: FrameData = None
+        # Номер последнего произведённого кадра; GUI сверяет с data.seq,
+        # чтобы не обрабатывать скопившиеся в очереди событий старые кадры
+        self.frame_seq = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = threading.Thread(
+            target=self._capture_loop, name="camera-capture", daemon=True)
+        self._worker.start()
+
+    def _capture_loop(self):
+        while not self._stop_event.is_set():
+            data = self._process_frame()
+            if data.raw_frame is None:
+                # Камера не отдала кадр — не крутим цикл вхолостую
+                time.sleep(0.005)
+                continue
+            frame = data.raw_frame
+            h, w, _ = frame.shape
+            image = QImage(frame.data, w, h, frame.strides[0],
+                           QImage.Format_BGR888)
+            # mirrored() зеркалит для удобства пользователя и заодно делает
+            # глубокую копию — numpy-буфер дальше не нужен. Сразу приводим
+            # к RGB32, чтобы GUI-поток не тратил кадровый бюджет на
+            # конвертацию в set_camera_frame
+            data.qt_image = image.mirrored(True, False).convertToFormat(
+                QImage.Format_RGB32)
+            self.frame_seq += 1
+            data.seq = self.frame_seq
+            with self._lock:
+                self._latest = data
+            self.frame_ready.emit(data)
+
     def get_frame_data(self) -> FrameData:
+        """Последний готовый кадр (неблокирующе, из потока камеры).
+
+        Если новый кадр ещё не готов, повторяет предыдущие данные жеста,
+        чтобы активный штрих не обрывался между кадрами камеры; сам кадр
+        при этом повторно не отдаётся (qt_image = None).
+        """
+        with self._lock:
+            data = self._latest
+            self._latest = None
+        if data is not None:
+            self._last_delivered = data
+            return data
+        repeat = self._last_delivered
+        if repeat is None:
+            return FrameData()
+        repeat.qt_image = None
+        return repeat
+
+    def _process_frame(self) -> FrameData:
         frame_data = FrameData()
         
         # 1. Захват кадра
@@ -149,5 +214,8 @@ class CameraService:
         return best_hand
 
     def release(self):
+        self._stop_event.set()
+        if self._worker.is_alive():
+            self._worker.join(timeout=1.0)
         if self.cap.isOpened():
             self.cap.release()
\ No newline at end of file
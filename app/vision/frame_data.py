@@ -2,11 +2,17 @@ from dataclasses import dataclass
 from typing import Optional
 import numpy as np
 
+from PySide6.QtGui import QImage
+
 @dataclass
 class FrameData:
     # Входной кадр (BGR, numpy array)
     raw_frame: Optional[np.ndarray] = None
 
+    # Готовый к отрисовке кадр (отзеркаленный QImage); собирается в потоке
+    # камеры, чтобы GUI-поток не тратил бюджет кадра на конвертацию
+    qt_image: Optional[QImage] = None
+
     # Основные данные для холста
     gesture: str = "idle"          # "drawing", "erasing", "idle"
     
@@ -21,4 +27,5 @@ class FrameData:
     latency_ms: float = 0.0
     
     # Служебные флаги
-    is_tracking: bool = False      # Захвачена ли рука системой
\ No newline at end of file
+    is_tracking: bool = False      # Захвачена ли рука системой
+    seq: int = 0                   # Порядковый номер кадра (для отброса устаревших)
\ No newline at end of file